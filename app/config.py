@@ -1,21 +1,48 @@
-"""Configuration management using Pydantic Settings."""
+"""Configuration loaded from environment variables (and an optional .env file)."""
 
+import os
 import re
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Literal
+from typing import Any, Literal, get_args
 
-from pydantic import field_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from dotenv import dotenv_values
 
+_BOT_TOKEN_RE = re.compile(r"^\d{5,15}:[A-Za-z0-9_-]{30,45}$")
+_SECRET_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+LogLevel = Literal["debug", "info", "warning", "error"]
+OutputHandler = Literal["stdout", "noop"]
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+
+def _parse_bool(name: str, v: str) -> bool:
+    v = v.strip().lower()
+    if v in _TRUE:
+        return True
+    if v in _FALSE:
+        return False
+    raise ValueError(f"{name} must be a boolean, got {v!r}")
+
+
+def _parse_int(name: str, v: str) -> int:
+    try:
+        return int(v)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {v!r}") from None
 
-class Settings(BaseSettings):
-    """Application settings loaded from environment variables."""
 
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        extra="ignore",
-    )
+def _parse_choice(name: str, v: str, choices: tuple[str, ...]) -> str:
+    if v not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {v!r}")
+    return v
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Application settings loaded from environment variables."""
 
     # Telegram Bot Configuration
     bot_token: str
@@ -27,40 +54,95 @@ class Settings(BaseSettings):
     webhook_drop_pending: bool = True
 
     # Application Settings
-    log_level: Literal["debug", "info", "warning", "error"] = "info"
-    output_handler: Literal["stdout", "noop"] = "stdout"
+    log_level: LogLevel = "info"
+    output_handler: OutputHandler = "stdout"
+    include_raw: bool = False
 
     # Server Settings
     host: str = "0.0.0.0"
     port: int = 8000
 
-    @field_validator("bot_token")
+    def __post_init__(self) -> None:
+        self.validate_bot_token(self.bot_token)
+        self.validate_webhook_secret(self.tg_webhook_secret)
+
     @classmethod
-    def validate_bot_token(cls, v: str) -> str:
+    def from_env(cls, env_file: str | None = ".env") -> "Settings":
+        """Build settings from the process environment.
+
+        Values from ``env_file`` are used as fallbacks; real environment
+        variables always win. Names are matched case-insensitively.
+        """
+        env: dict[str, str] = {}
+        if env_file and os.path.isfile(env_file):
+            env.update(
+                (k.upper(), v)
+                for k, v in dotenv_values(env_file, encoding="utf-8").items()
+                if v is not None
+            )
+        env.update((k.upper(), v) for k, v in os.environ.items())
+
+        for required in ("BOT_TOKEN", "TG_WEBHOOK_SECRET"):
+            if required not in env:
+                raise ValueError(f"{required} is required")
+
+        kwargs: dict[str, Any] = {
+            "bot_token": env["BOT_TOKEN"],
+            "tg_webhook_secret": env["TG_WEBHOOK_SECRET"],
+        }
+        if "WEBHOOK_URL" in env:
+            kwargs["webhook_url"] = env["WEBHOOK_URL"]
+        if "WEBHOOK_MAX_CONNECTIONS" in env:
+            kwargs["webhook_max_connections"] = _parse_int(
+                "WEBHOOK_MAX_CONNECTIONS", env["WEBHOOK_MAX_CONNECTIONS"]
+            )
+        if "WEBHOOK_DROP_PENDING" in env:
+            kwargs["webhook_drop_pending"] = _parse_bool(
+                "WEBHOOK_DROP_PENDING", env["WEBHOOK_DROP_PENDING"]
+            )
+        if "LOG_LEVEL" in env:
+            kwargs["log_level"] = _parse_choice(
+                "LOG_LEVEL", env["LOG_LEVEL"], get_args(LogLevel)
+            )
+        if "OUTPUT_HANDLER" in env:
+            kwargs["output_handler"] = _parse_choice(
+                "OUTPUT_HANDLER", env["OUTPUT_HANDLER"], get_args(OutputHandler)
+            )
+        if "INCLUDE_RAW" in env:
+            kwargs["include_raw"] = _parse_bool("INCLUDE_RAW", env["INCLUDE_RAW"])
+        if "HOST" in env:
+            kwargs["host"] = env["HOST"]
+        if "PORT" in env:
+            kwargs["port"] = _parse_int("PORT", env["PORT"])
+
+        return cls(**kwargs)
+
+    @staticmethod
+    def validate_bot_token(v: str) -> str:
         """Validate Telegram bot token format.
-        
+
         Token format: 123456789:AAxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+        (5-15 digit bot ID, then 30-45 characters of A-Z, a-z, 0-9, _ or -)
         """
-        pattern = r"^\d+:[A-Za-z0-9_-]+$"
-        if not re.match(pattern, v):
+        if not _BOT_TOKEN_RE.match(v):
             raise ValueError(
-                "Invalid bot token format. Expected format: 123456789:AAxxxx..."
+                "Invalid bot token format. Expected a 5-15 digit bot ID, a colon "
+                "and 30-45 characters of A-Z, a-z, 0-9, _ or - "
+                "(e.g. 123456789:AAxxxx...)"
             )
         return v
 
-    @field_validator("tg_webhook_secret")
-    @classmethod
-    def validate_webhook_secret(cls, v: str) -> str:
+    @staticmethod
+    def validate_webhook_secret(v: str) -> str:
         """Validate webhook secret token.
-        
+
         Must be 1-256 characters, only A-Z, a-z, 0-9, _ and - allowed.
         """
         if not v:
             raise ValueError("Webhook secret cannot be empty")
         if len(v) > 256:
             raise ValueError("Webhook secret must be 256 characters or less")
-        pattern = r"^[A-Za-z0-9_-]+$"
-        if not re.match(pattern, v):
+        if not _SECRET_RE.match(v):
             raise ValueError(
                 "Webhook secret can only contain A-Z, a-z, 0-9, _ and -"
             )
@@ -70,8 +152,7 @@ class Settings(BaseSettings):
 @lru_cache
 def get_settings() -> Settings:
     """Get cached settings instance.
-    
+
     Settings are loaded once and cached for the lifetime of the application.
     """
-    return Settings()
-
+    return Settings.from_env()
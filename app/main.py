@@ -1,15 +1,19 @@
 """Telegram Ingestion Service - A minimal webhook receiver for Telegram channels."""
 
-import json
+import asyncio
+import hmac
+import inspect
 import logging
 import sys
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from datetime import datetime
 from typing import Any
 
-from fastapi import FastAPI, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+import msgspec
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
 
 from app import __version__
 from app.config import get_settings
@@ -23,20 +27,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Settings are fixed at startup, so read the ones the webhook needs just once
+_SECRET = settings.tg_webhook_secret.encode()
+_INCLUDE_RAW = settings.include_raw
+_DEBUG = settings.log_level == "debug"
+
+# Channel post updates are a few KB at most - anything bigger isn't from Telegram
+MAX_BODY_BYTES = 64 * 1024
+
+# Recently seen update_ids, so Telegram's retries aren't handled twice
+_SEEN: OrderedDict[int, None] = OrderedDict()
+_SEEN_MAX = 4096
+
 
 # =============================================================================
-# Pydantic Models for Telegram Updates
+# msgspec Structs for Telegram Updates
 # =============================================================================
+# Only fields used by normalize_update are declared; msgspec skips the rest
+# while decoding. gc=False is safe since these short-lived structs never
+# form reference cycles.
 
 
-class Chat(BaseModel):
+class Chat(msgspec.Struct, gc=False):
     """Telegram chat object (minimal fields we need)."""
     id: int
     title: str | None = None
-    type: str | None = None
 
 
-class Message(BaseModel):
+class Message(msgspec.Struct, gc=False):
     """Telegram message object (minimal fields we need)."""
     message_id: int
     chat: Chat
@@ -46,7 +64,7 @@ class Message(BaseModel):
     # We keep the raw data for anything else we might need later
 
 
-class Update(BaseModel):
+class Update(msgspec.Struct, gc=False):
     """Telegram update object."""
     update_id: int
     channel_post: Message | None = None
@@ -58,21 +76,28 @@ class Update(BaseModel):
 # =============================================================================
 
 
-class NormalizedMessage(BaseModel):
-    """Our internal message format - clean and consistent."""
-    source: str = "telegram"
+class NormalizedMessage(msgspec.Struct, frozen=True, gc=False):
+    """Our internal message format - clean and consistent.
+    
+    Built only from already-validated updates, so it's a plain Struct rather
+    than a validating model.
+    """
+    source: str
     chat_id: str
     chat_title: str | None
     message_id: int
     timestamp: int
     text: str | None
-    raw: dict[str, Any]
+    raw: dict[str, Any] | None = None
 
 
-def normalize_update(update: Update, raw_payload: dict) -> NormalizedMessage | None:
+def normalize_update(
+    update: Update, raw_payload: dict | None = None
+) -> NormalizedMessage | None:
     """Transform a Telegram update into our normalized format.
     
-    Returns None if the update doesn't contain a channel_post.
+    Returns None if the update doesn't contain a channel_post. The raw payload
+    is only attached when the caller decoded one (see INCLUDE_RAW).
     """
     if not update.channel_post:
         return None
@@ -80,13 +105,13 @@ def normalize_update(update: Update, raw_payload: dict) -> NormalizedMessage | N
     msg = update.channel_post
     
     return NormalizedMessage(
-        source="telegram",
-        chat_id=str(msg.chat.id),
-        chat_title=msg.chat.title,
-        message_id=msg.message_id,
-        timestamp=msg.date,
-        text=msg.text or msg.caption,  # text for regular messages, caption for media
-        raw=raw_payload,
+        "telegram",
+        str(msg.chat.id),
+        msg.chat.title,
+        msg.message_id,
+        msg.date,
+        msg.text or msg.caption,  # text for regular messages, caption for media
+        raw_payload,
     )
 
 
@@ -94,17 +119,29 @@ def normalize_update(update: Update, raw_payload: dict) -> NormalizedMessage | N
 # Output Handlers
 # =============================================================================
 
+_STDOUT = sys.stdout.buffer
+
 
 def handle_stdout(message: NormalizedMessage) -> None:
-    """Log the message to stdout."""
-    timestamp = datetime.fromtimestamp(message.timestamp).isoformat()
-    logger.info(
-        "📨 New message | chat=%s | id=%s | time=%s | text=%s",
-        message.chat_title or message.chat_id,
-        message.message_id,
-        timestamp,
-        message.text[:100] if message.text else "(no text)",
+    """Write the message to stdout as a JSON line.
+    
+    Bypasses logging (record, formatter, lock) and writes bytes directly, but
+    still honours LOG_LEVEL: nothing is written when INFO is filtered out.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    _STDOUT.write(
+        msgspec.json.encode(
+            {
+                "chat": message.chat_title or message.chat_id,
+                "id": message.message_id,
+                "ts": message.timestamp,
+                "text": message.text[:100] if message.text else None,
+            }
+        )
+        + b"\n"
     )
+    _STDOUT.flush()
 
 
 def handle_noop(message: NormalizedMessage) -> None:
@@ -118,14 +155,52 @@ HANDLERS = {
     "noop": handle_noop,
 }
 
+_OUTPUT_HANDLER = HANDLERS.get(settings.output_handler, handle_stdout)
+_HANDLER_IS_ASYNC = inspect.iscoroutinefunction(_OUTPUT_HANDLER)
+
+# Strong references to in-flight handler tasks so they aren't GC'd early
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+
+
+async def _run_handler(message: NormalizedMessage) -> None:
+    """Run the output handler after the webhook has replied.
+    
+    Sync handlers are expected to be fast (a buffered write), so they run
+    inline in the task: no thread hop, and messages are emitted in arrival
+    order. Errors are logged and swallowed - Telegram already got its 200.
+    """
+    try:
+        if _HANDLER_IS_ASYNC:
+            await _OUTPUT_HANDLER(message)
+        else:
+            _OUTPUT_HANDLER(message)
+    except Exception as e:
+        logger.error("Handler error: %s", e)
+
+
+def _dispatch(message: NormalizedMessage) -> None:
+    """Schedule the output handler without waiting for it."""
+    task = asyncio.create_task(_run_handler(message))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
 
 # =============================================================================
-# FastAPI Application
+# Starlette Application
 # =============================================================================
 
 
+class MsgspecJSONResponse(JSONResponse):
+    """JSONResponse that encodes with msgspec instead of stdlib json.
+    
+    Used for the dynamic error replies; fixed replies are pre-encoded.
+    """
+    def render(self, content: Any) -> bytes:
+        return msgspec.json.encode(content)
+
+
 @asynccontextmanager
-async def lifespan(app: FastAPI):
+async def lifespan(app: Starlette):
     """Application lifespan handler for startup/shutdown events."""
     logger.info("Starting Telegram Ingestion Service v%s", __version__)
     logger.info("Log level: %s", settings.log_level)
@@ -139,99 +214,165 @@ async def lifespan(app: FastAPI):
     
     yield
     
+    # Let in-flight handlers finish before shutting down
+    if _BACKGROUND_TASKS:
+        await asyncio.gather(*_BACKGROUND_TASKS, return_exceptions=True)
+    
     logger.info("Shutting down Telegram Ingestion Service")
 
 
-app = FastAPI(
-    title="Telegram Ingestion Service",
-    description="A minimal service that listens to messages from a private Telegram channel via webhooks",
-    version=__version__,
-    lifespan=lifespan,
+# =============================================================================
+# Static Responses
+# =============================================================================
+
+# These bodies never change, so encode them once at import time
+_OK = msgspec.json.encode({"status": "ok"})
+_IGNORED = msgspec.json.encode({"status": "ignored"})
+_HEALTH = msgspec.json.encode(
+    {
+        "status": "healthy",
+        "version": __version__,
+        "service": "telegram-ingestion",
+    }
+)
+_ROOT = msgspec.json.encode(
+    {
+        "service": "telegram-ingestion",
+        "version": __version__,
+        "health": "/health",
+    }
 )
 
 
+def _json_response(body: bytes) -> Response:
+    """Wrap a pre-encoded JSON body in a fresh Response.
+    
+    A new Response is built per request since Starlette mutates its headers.
+    """
+    return Response(content=body, media_type="application/json")
+
+
+def _error(status_code: int, detail: str) -> Response:
+    """Build a JSON error response in the {"detail": ...} shape."""
+    return MsgspecJSONResponse({"detail": detail}, status_code=status_code)
+
+
 # =============================================================================
 # Endpoints
 # =============================================================================
 
 
-@app.get("/health")
-async def health_check() -> JSONResponse:
+async def health_check(request: Request) -> Response:
     """Health check endpoint."""
-    return JSONResponse(
-        content={
-            "status": "healthy",
-            "version": __version__,
-            "service": "telegram-ingestion",
-        }
-    )
+    return _json_response(_HEALTH)
 
 
-@app.get("/")
-async def root() -> JSONResponse:
+async def root(request: Request) -> Response:
     """Root endpoint with service info."""
-    return JSONResponse(
-        content={
-            "service": "telegram-ingestion",
-            "version": __version__,
-            "docs": "/docs",
-            "health": "/health",
-        }
-    )
+    return _json_response(_ROOT)
 
 
-@app.post("/telegram/webhook")
-async def telegram_webhook(
-    request: Request,
-    x_telegram_bot_api_secret_token: str | None = Header(None),
-) -> JSONResponse:
+async def telegram_webhook(request: Request) -> Response:
     """Receive webhook updates from Telegram.
     
     This endpoint:
     1. Validates the secret token
     2. Parses the Telegram update
     3. Normalizes the message
-    4. Dispatches to the configured handler
+    4. Dispatches to the configured handler in the background
     5. Returns 200 quickly (Telegram expects fast responses)
     """
-    # Validate secret token
-    if x_telegram_bot_api_secret_token != settings.tg_webhook_secret:
+    # Validate secret token (headers arrive latin-1 decoded, so this can't fail)
+    secret_token = request.headers.get("x-telegram-bot-api-secret-token")
+    if not secret_token or not hmac.compare_digest(
+        secret_token.encode("latin-1"), _SECRET
+    ):
         logger.warning("Webhook rejected: invalid secret token")
-        raise HTTPException(status_code=401, detail="Invalid secret token")
+        return _error(401, "Invalid secret token")
     
-    # Parse the raw payload
+    # Reject oversized payloads before reading them
     try:
-        raw_payload = await request.json()
-    except json.JSONDecodeError:
-        logger.warning("Webhook rejected: invalid JSON")
-        raise HTTPException(status_code=400, detail="Invalid JSON")
+        content_length = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        return _error(400, "Invalid Content-Length")
+    if content_length > MAX_BODY_BYTES:
+        logger.warning("Webhook rejected: payload too large (%s bytes)", content_length)
+        return _error(413, "Payload too large")
     
-    logger.debug("Received update: %s", raw_payload)
+    # Stream the body so chunked uploads without Content-Length are cut off as
+    # soon as they pass the cap, instead of being buffered in full first
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_BODY_BYTES:
+            logger.warning("Webhook rejected: payload too large (over %s bytes)", received)
+            return _error(413, "Payload too large")
+        chunks.append(chunk)
+    body = b"".join(chunks)
     
-    # Parse into our Telegram model
+    # Cheap pre-check: anything without a channel_post key gets ignored without
+    # parsing. A false positive (e.g. the string inside a caption) just falls
+    # through to the full parse below. Telegram never escapes key names.
+    if b'"channel_post"' not in body:
+        if _DEBUG:
+            logger.debug("Ignoring update (no channel_post key)")
+        return _json_response(_IGNORED)
+    
+    # Parse the JSON exactly once: straight into our Telegram structs, or, when
+    # handlers want the raw payload, into a dict that's then converted
     try:
-        update = Update(**raw_payload)
-    except Exception as e:
+        if _INCLUDE_RAW:
+            raw_payload = msgspec.json.decode(body)
+            update = msgspec.convert(raw_payload, Update)
+        else:
+            raw_payload = None
+            update = msgspec.json.decode(body, type=Update)
+    except msgspec.ValidationError as e:
         logger.warning("Webhook rejected: failed to parse update - %s", e)
-        raise HTTPException(status_code=400, detail="Invalid update format")
+        return _error(400, "Invalid update format")
+    except msgspec.DecodeError:
+        logger.warning("Webhook rejected: invalid JSON")
+        return _error(400, "Invalid JSON")
+    
+    if _DEBUG:
+        logger.debug("Received update: %s", update)
     
     # Normalize the message
     normalized = normalize_update(update, raw_payload)
     
     if normalized is None:
         # Not a channel_post, ignore it
-        logger.debug("Ignoring update (not a channel_post): %s", update.update_id)
-        return JSONResponse(content={"status": "ignored"})
+        if _DEBUG:
+            logger.debug("Ignoring update (not a channel_post): %s", update.update_id)
+        return _json_response(_IGNORED)
     
-    # Dispatch to handler
-    handler = HANDLERS.get(settings.output_handler, handle_stdout)
-    try:
-        handler(normalized)
-    except Exception as e:
-        logger.error("Handler error: %s", e)
-        # Still return 200 - we don't want Telegram to retry
+    # Skip redelivered channel posts. Checked after normalization so ignored
+    # updates keep replying "ignored". No await between check and insert, so
+    # this is safe within a single event loop.
+    if update.update_id in _SEEN:
+        if _DEBUG:
+            logger.debug("Ignoring duplicate update: %s", update.update_id)
+        return _json_response(_OK)
+    _SEEN[update.update_id] = None
+    if len(_SEEN) > _SEEN_MAX:
+        _SEEN.popitem(last=False)
+    
+    # Dispatch to handler without waiting - handler errors never reach
+    # Telegram, so it won't retry
+    _dispatch(normalized)
     
-    return JSONResponse(content={"status": "ok"})
+    return _json_response(_OK)
+
+
+app = Starlette(
+    routes=[
+        Route("/telegram/webhook", telegram_webhook, methods=["POST"]),
+        Route("/health", health_check, methods=["GET"]),
+        Route("/", root, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
 
 
 # =============================================================================
@@ -249,6 +390,7 @@ def run():
         port=settings.port,
         reload=False,
         log_level=settings.log_level,
+        access_log=False,
     )
 
 
@@ -0,0 +1,97 @@
+"""Tests for settings loading."""
+
+import pytest
+
+from app.config import Settings
+
+VALID_TOKEN = "123456789:AAbcdefghijklmnopqrstuvwxyz0123456789"
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Start from an environment containing only the required settings."""
+    for name in (
+        "WEBHOOK_URL",
+        "WEBHOOK_MAX_CONNECTIONS",
+        "WEBHOOK_DROP_PENDING",
+        "LOG_LEVEL",
+        "OUTPUT_HANDLER",
+        "INCLUDE_RAW",
+        "HOST",
+        "PORT",
+    ):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("BOT_TOKEN", VALID_TOKEN)
+    monkeypatch.setenv("TG_WEBHOOK_SECRET", "s3cret_token-1")
+    return monkeypatch
+
+
+class TestFromEnv:
+    """Test reading settings from the environment."""
+
+    def test_defaults(self, env):
+        """Optional settings should fall back to their defaults."""
+        settings = Settings.from_env(env_file=None)
+        assert settings.bot_token == VALID_TOKEN
+        assert settings.log_level == "info"
+        assert settings.output_handler == "stdout"
+        assert settings.include_raw is False
+        assert settings.port == 8000
+
+    def test_typed_values_parsed(self, env):
+        """Bool, int and choice settings should be converted."""
+        env.setenv("INCLUDE_RAW", "true")
+        env.setenv("PORT", "9000")
+        env.setenv("LOG_LEVEL", "debug")
+        settings = Settings.from_env(env_file=None)
+        assert settings.include_raw is True
+        assert settings.port == 9000
+        assert settings.log_level == "debug"
+
+    def test_env_file_is_fallback(self, env, tmp_path):
+        """Values from the env file should not override real env vars."""
+        env_file = tmp_path / ".env"
+        env_file.write_text("PORT=1234\nHOST=127.0.0.1\n")
+        env.setenv("PORT", "9000")
+        settings = Settings.from_env(env_file=str(env_file))
+        assert settings.port == 9000
+        assert settings.host == "127.0.0.1"
+
+    def test_missing_required_raises(self, env):
+        """Missing required settings should raise."""
+        env.delenv("BOT_TOKEN")
+        with pytest.raises(ValueError, match="BOT_TOKEN"):
+            Settings.from_env(env_file=None)
+
+    def test_invalid_choice_raises(self, env):
+        """Values outside the allowed set should raise."""
+        env.setenv("OUTPUT_HANDLER", "kafka")
+        with pytest.raises(ValueError, match="OUTPUT_HANDLER"):
+            Settings.from_env(env_file=None)
+
+
+class TestValidation:
+    """Test token and secret validation."""
+
+    def test_invalid_bot_token_raises(self):
+        """Malformed bot tokens should be rejected."""
+        with pytest.raises(ValueError, match="bot token"):
+            Settings(bot_token="not-a-token", tg_webhook_secret="secret")
+
+    @pytest.mark.parametrize(
+        "token",
+        [
+            "1234:AAbcdefghijklmnopqrstuvwxyz0123456789",  # bot ID too short
+            "123456789:AAbcdef",  # secret part too short
+            "123456789:" + "A" * 46,  # secret part too long
+        ],
+    )
+    def test_out_of_range_bot_token_raises(self, token):
+        """Tokens outside the documented length bounds should be rejected."""
+        with pytest.raises(ValueError, match="bot token"):
+            Settings(bot_token=token, tg_webhook_secret="secret")
+
+    def test_invalid_secret_raises(self):
+        """Secrets with disallowed characters should be rejected."""
+        with pytest.raises(ValueError, match="Webhook secret"):
+            Settings(bot_token=VALID_TOKEN, tg_webhook_secret="bad secret!")
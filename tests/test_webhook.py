@@ -1,16 +1,38 @@
 """Tests for the Telegram webhook endpoint."""
 
+import asyncio
+import io
+import logging
+
+import msgspec
 import pytest
-from fastapi.testclient import TestClient
+from starlette.testclient import TestClient
 
-from app.main import app
+from app import main
 from app.config import get_settings
+from app.main import (
+    MAX_BODY_BYTES,
+    NormalizedMessage,
+    Update,
+    app,
+    handle_stdout,
+    normalize_update,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_seen_updates():
+    """Forget delivered update_ids so each test starts with fresh dedup state."""
+    main._SEEN.clear()
+    yield
+    main._SEEN.clear()
 
 
 @pytest.fixture
 def client():
-    """Create a test client."""
-    return TestClient(app)
+    """Create a test client (entering it runs the app lifespan)."""
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture
@@ -91,6 +113,30 @@ class TestWebhookProcessing:
         assert response.status_code == 200
         assert response.json()["status"] == "ignored"
 
+    def test_duplicate_non_channel_post_still_ignored(self, client, valid_secret):
+        """Redelivered non-channel_post updates should keep replying 'ignored'."""
+        for _ in range(2):
+            response = client.post(
+                "/telegram/webhook",
+                json={"update_id": 777, "channel_post": None},
+                headers={"X-Telegram-Bot-Api-Secret-Token": valid_secret}
+            )
+            assert response.status_code == 200
+            assert response.json()["status"] == "ignored"
+
+    def test_body_without_channel_post_ignored_unparsed(self, client, valid_secret):
+        """Bodies without a channel_post key should be ignored before parsing."""
+        response = client.post(
+            "/telegram/webhook",
+            content="not even json",
+            headers={
+                "X-Telegram-Bot-Api-Secret-Token": valid_secret,
+                "Content-Type": "application/json"
+            }
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "ignored"
+
     def test_caption_used_for_media(self, client, valid_secret):
         """Caption should be used when text is not present (media messages)."""
         media_post = {
@@ -111,6 +157,148 @@ class TestWebhookProcessing:
         assert response.status_code == 200
         assert response.json()["status"] == "ok"
 
+    def test_duplicate_update_handled_once(
+        self, valid_secret, sample_channel_post, monkeypatch
+    ):
+        """Redelivered updates should not reach the handler again."""
+        handled = []
+        monkeypatch.setattr(main, "_OUTPUT_HANDLER", handled.append)
+        # Leaving the client waits for background handlers to finish
+        with TestClient(app) as client:
+            for _ in range(2):
+                response = client.post(
+                    "/telegram/webhook",
+                    json=sample_channel_post,
+                    headers={"X-Telegram-Bot-Api-Secret-Token": valid_secret}
+                )
+                assert response.status_code == 200
+                assert response.json()["status"] == "ok"
+        assert len(handled) == 1
+
+    def test_raw_payload_passed_when_enabled(
+        self, valid_secret, sample_channel_post, monkeypatch
+    ):
+        """With INCLUDE_RAW on, handlers should receive the decoded payload."""
+        handled = []
+        monkeypatch.setattr(main, "_INCLUDE_RAW", True)
+        monkeypatch.setattr(main, "_OUTPUT_HANDLER", handled.append)
+        with TestClient(app) as client:
+            response = client.post(
+                "/telegram/webhook",
+                json=sample_channel_post,
+                headers={"X-Telegram-Bot-Api-Secret-Token": valid_secret}
+            )
+        assert response.status_code == 200
+        assert handled[0].raw == sample_channel_post
+
+    def test_handler_error_logged_and_returns_ok(
+        self, valid_secret, sample_channel_post, monkeypatch, caplog
+    ):
+        """A failing handler should be logged without changing the response."""
+        def boom(message):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(main, "_OUTPUT_HANDLER", boom)
+        with TestClient(app) as client:
+            response = client.post(
+                "/telegram/webhook",
+                json=sample_channel_post,
+                headers={"X-Telegram-Bot-Api-Secret-Token": valid_secret}
+            )
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+        assert "Handler error: boom" in caplog.text
+
+    def test_async_handler_awaited(
+        self, valid_secret, sample_channel_post, monkeypatch
+    ):
+        """Coroutine handlers should be awaited in the background task."""
+        handled = []
+
+        async def handler(message):
+            await asyncio.sleep(0)
+            handled.append(message)
+
+        monkeypatch.setattr(main, "_OUTPUT_HANDLER", handler)
+        monkeypatch.setattr(main, "_HANDLER_IS_ASYNC", True)
+        with TestClient(app) as client:
+            client.post(
+                "/telegram/webhook",
+                json=sample_channel_post,
+                headers={"X-Telegram-Bot-Api-Secret-Token": valid_secret}
+            )
+        assert [m.message_id for m in handled] == [42]
+
+    def test_sync_handler_keeps_arrival_order(
+        self, valid_secret, sample_channel_post, monkeypatch
+    ):
+        """Sync handlers should see messages in the order they arrived."""
+        handled = []
+        monkeypatch.setattr(main, "_OUTPUT_HANDLER", handled.append)
+        with TestClient(app) as client:
+            for i in range(20):
+                sample_channel_post["update_id"] = i
+                sample_channel_post["channel_post"]["message_id"] = i
+                client.post(
+                    "/telegram/webhook",
+                    json=sample_channel_post,
+                    headers={"X-Telegram-Bot-Api-Secret-Token": valid_secret}
+                )
+        assert [m.message_id for m in handled] == list(range(20))
+
+
+class TestNormalizeUpdate:
+    """Test update normalization."""
+
+    def test_raw_omitted_by_default(self, sample_channel_post):
+        """Raw payload should not be attached unless one is passed in."""
+        update = msgspec.convert(sample_channel_post, Update)
+        normalized = normalize_update(update)
+        assert normalized.raw is None
+        assert normalized.chat_id == "-1001234567890"
+        assert normalized.text == "Hello from the test!"
+
+    def test_raw_attached_when_given(self, sample_channel_post):
+        """Raw payload should be kept when the caller provides it."""
+        update = msgspec.convert(sample_channel_post, Update)
+        normalized = normalize_update(update, sample_channel_post)
+        assert normalized.raw == sample_channel_post
+
+
+class TestStdoutHandler:
+    """Test the stdout output handler."""
+
+    @pytest.fixture
+    def stdout(self, monkeypatch):
+        """Capture what the handler writes to stdout."""
+        buffer = io.BytesIO()
+        monkeypatch.setattr(main, "_STDOUT", buffer)
+        return buffer
+
+    @pytest.fixture
+    def message(self):
+        return NormalizedMessage(
+            "telegram", "-100123", "Test Channel", 42, 1735500000, "x" * 150
+        )
+
+    def test_writes_json_line(self, stdout, message, caplog):
+        """Messages should be written as one truncated JSON line."""
+        caplog.set_level(logging.INFO, logger=main.logger.name)
+        handle_stdout(message)
+        assert stdout.getvalue().endswith(b"\n")
+        assert msgspec.json.decode(stdout.getvalue()) == {
+            "chat": "Test Channel",
+            "id": 42,
+            "ts": 1735500000,
+            "text": "x" * 100,
+        }
+
+    def test_silent_above_info(self, stdout, message, caplog):
+        """Nothing should be written when LOG_LEVEL filters out INFO."""
+        caplog.set_level(logging.WARNING, logger=main.logger.name)
+        handle_stdout(message)
+        assert stdout.getvalue() == b""
+
 
 class TestWebhookValidation:
     """Test request validation."""
@@ -119,7 +307,7 @@ class TestWebhookValidation:
         """Malformed JSON should return 400."""
         response = client.post(
             "/telegram/webhook",
-            content="not valid json",
+            content='{"update_id": 1, "channel_post": not valid json',
             headers={
                 "X-Telegram-Bot-Api-Secret-Token": valid_secret,
                 "Content-Type": "application/json"
@@ -127,6 +315,53 @@ class TestWebhookValidation:
         )
         assert response.status_code == 400
 
+    def test_oversized_payload_returns_413(self, client, valid_secret):
+        """Payloads over the size cap should be rejected before parsing."""
+        response = client.post(
+            "/telegram/webhook",
+            content=b"x" * (MAX_BODY_BYTES + 1),
+            headers={
+                "X-Telegram-Bot-Api-Secret-Token": valid_secret,
+                "Content-Type": "application/json"
+            }
+        )
+        assert response.status_code == 413
+
+    def test_oversized_chunked_payload_stops_early(self, valid_secret):
+        """Chunked bodies without Content-Length should be cut off at the cap."""
+        received = []
+        sent = []
+
+        def chunks():
+            for _ in range(1000):
+                yield b"x" * 1024
+
+        body = chunks()
+
+        # Drive the ASGI app directly: TestClient buffers the whole body first
+        async def receive():
+            received.append(1)
+            return {"type": "http.request", "body": next(body), "more_body": True}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/telegram/webhook",
+            "headers": [
+                (b"x-telegram-bot-api-secret-token", valid_secret.encode()),
+                (b"transfer-encoding", b"chunked"),
+            ],
+            "query_string": b"",
+        }
+        asyncio.run(app(scope, receive, send))
+
+        assert sent[0]["status"] == 413
+        # Reading stopped just past the cap, not at the end of the body
+        assert len(received) == MAX_BODY_BYTES // 1024 + 1
+
 
 class TestHealthCheck:
     """Test health and root endpoints."""